@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-15 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['resolved', 'due_date', '-created_at'], name='todo_ordering_idx'),
+        ),
+    ]
@@ -12,6 +12,9 @@ class Todo(models.Model):
 
     class Meta:
         ordering = ['resolved', 'due_date', '-created_at']
+        indexes = [
+            models.Index(fields=['resolved', 'due_date', '-created_at'], name='todo_ordering_idx'),
+        ]
 
     def __str__(self):
         return self.title
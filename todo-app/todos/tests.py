@@ -1,8 +1,11 @@
 from datetime import date, timedelta
+from urllib.parse import quote
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 from .models import Todo
 from .forms import TodoForm
+from .views import TodoListView
 
 
 class TodoModelTests(TestCase):
@@ -39,28 +42,27 @@ class TodoModelTests(TestCase):
     def test_ordering(self):
         """Test that todos are ordered by resolved, due_date, created_at."""
         # Create todos in specific order
-        todo_resolved = Todo.objects.create(
-            title="Resolved",
-            resolved=True,
-            due_date=date.today()
-        )
-        todo_active_soon = Todo.objects.create(
-            title="Active due soon",
-            resolved=False,
-            due_date=date.today() + timedelta(days=1)
-        )
-        todo_active_later = Todo.objects.create(
-            title="Active due later",
-            resolved=False,
-            due_date=date.today() + timedelta(days=7)
-        )
+        Todo.objects.bulk_create([
+            Todo(title="Resolved", resolved=True, due_date=date.today()),
+            Todo(
+                title="Active due soon",
+                resolved=False,
+                due_date=date.today() + timedelta(days=1)
+            ),
+            Todo(
+                title="Active due later",
+                resolved=False,
+                due_date=date.today() + timedelta(days=7)
+            ),
+        ])
         
-        todos = list(Todo.objects.all())
+        # Compare titles since bulk_create may not set pks on every backend
+        titles = list(Todo.objects.values_list('title', flat=True))
         # Active todos should come before resolved (resolved=False < resolved=True)
         # Among active, earlier due dates come first
-        self.assertEqual(todos[0], todo_active_soon)   # Active, due sooner
-        self.assertEqual(todos[1], todo_active_later)  # Active, due later
-        self.assertEqual(todos[2], todo_resolved)      # Resolved at the end
+        self.assertEqual(titles[0], "Active due soon")   # Active, due sooner
+        self.assertEqual(titles[1], "Active due later")  # Active, due later
+        self.assertEqual(titles[2], "Resolved")          # Resolved at the end
 
 
 class TodoFormTests(TestCase):
@@ -115,11 +117,14 @@ class TodoListViewTests(TestCase):
     def setUp(self):
         self.client = Client()
         self.list_url = reverse('todos:list')
+        cache.clear()
 
     def test_list_view_displays_todos(self):
         """Test that GET /todos/ shows all todos."""
-        Todo.objects.create(title="Task 1")
-        Todo.objects.create(title="Task 2")
+        Todo.objects.bulk_create([
+            Todo(title="Task 1"),
+            Todo(title="Task 2"),
+        ])
         
         response = self.client.get(self.list_url)
         
@@ -129,8 +134,10 @@ class TodoListViewTests(TestCase):
 
     def test_list_view_filter_active(self):
         """Test that ?filter=active shows only unresolved todos."""
-        Todo.objects.create(title="Active Task", resolved=False)
-        Todo.objects.create(title="Done Task", resolved=True)
+        Todo.objects.bulk_create([
+            Todo(title="Active Task", resolved=False),
+            Todo(title="Done Task", resolved=True),
+        ])
         
         response = self.client.get(f"{self.list_url}?filter=active")
         
@@ -140,8 +147,10 @@ class TodoListViewTests(TestCase):
 
     def test_list_view_filter_resolved(self):
         """Test that ?filter=resolved shows only completed todos."""
-        Todo.objects.create(title="Active Task", resolved=False)
-        Todo.objects.create(title="Done Task", resolved=True)
+        Todo.objects.bulk_create([
+            Todo(title="Active Task", resolved=False),
+            Todo(title="Done Task", resolved=True),
+        ])
         
         response = self.client.get(f"{self.list_url}?filter=resolved")
         
@@ -158,9 +167,11 @@ class TodoListViewTests(TestCase):
 
     def test_list_view_context_counts(self):
         """Test that context includes correct counts."""
-        Todo.objects.create(title="Active 1", resolved=False)
-        Todo.objects.create(title="Active 2", resolved=False)
-        Todo.objects.create(title="Done 1", resolved=True)
+        Todo.objects.bulk_create([
+            Todo(title="Active 1", resolved=False),
+            Todo(title="Active 2", resolved=False),
+            Todo(title="Done 1", resolved=True),
+        ])
         
         response = self.client.get(self.list_url)
         
@@ -168,6 +179,145 @@ class TodoListViewTests(TestCase):
         self.assertEqual(response.context['active_count'], 2)
         self.assertEqual(response.context['resolved_count'], 1)
 
+    def test_list_view_due_date_highlighting(self):
+        """Test that overdue and due-today todos are highlighted."""
+        Todo.objects.bulk_create([
+            Todo(title="Late", due_date=date.today() - timedelta(days=1)),
+            Todo(title="Now", due_date=date.today()),
+        ])
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertContains(response, 'todo-due-date overdue')
+        self.assertContains(response, 'todo-due-date today')
+
+    def test_list_view_paginated(self):
+        """Test that the list is split into pages and keeps the filter."""
+        Todo.objects.bulk_create(
+            Todo(title=f"Task {i}") for i in range(TodoListView.paginate_by + 1)
+        )
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertTrue(response.context['is_paginated'])
+        self.assertEqual(len(response.context['todos']), TodoListView.paginate_by)
+        self.assertEqual(response.context['total_count'], TodoListView.paginate_by + 1)
+        self.assertContains(response, '?filter=all&page=2')
+        
+        response = self.client.get(f"{self.list_url}?page=2")
+        
+        self.assertEqual(len(response.context['todos']), 1)
+
+    def test_list_view_toggle_last_item_on_last_page(self):
+        """Test that completing the only todo on the last page still renders."""
+        Todo.objects.bulk_create(
+            Todo(title=f"Task {i}") for i in range(TodoListView.paginate_by + 1)
+        )
+        last_page_url = f"{self.list_url}?filter=active&page=2"
+        todo = self.client.get(last_page_url).context['todos'][0]
+        
+        toggle_url = reverse('todos:toggle', kwargs={'pk': todo.pk})
+        
+        response = self.client.post(
+            f"{toggle_url}?next={quote(last_page_url)}", follow=True
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.redirect_chain[-1][0], last_page_url)
+        self.assertEqual(response.context['page_obj'].number, 1)
+        self.assertEqual(len(response.context['todos']), TodoListView.paginate_by)
+
+    def test_list_view_unknown_filter_shows_all(self):
+        """Test that an unknown ?filter= value falls back to all todos."""
+        Todo.objects.bulk_create([
+            Todo(title="Active Task", resolved=False),
+            Todo(title="Done Task", resolved=True),
+        ])
+        
+        response = self.client.get(f"{self.list_url}?filter=a%26page%3D9")
+        
+        self.assertEqual(response.context['filter'], 'all')
+        self.assertContains(response, "Active Task")
+        self.assertContains(response, "Done Task")
+
+    def test_list_view_query_count(self):
+        """Test that counts are fetched with a single aggregate query."""
+        Todo.objects.bulk_create([
+            Todo(title="Active", description="Details", resolved=False),
+            Todo(title="Done", due_date=date.today(), resolved=True),
+        ])
+        
+        # Page count, page rows and the counts aggregate; no deferred field loads
+        with self.assertNumQueries(3):
+            self.client.get(self.list_url)
+
+    def test_list_view_counts_cached(self):
+        """Test that counts are served from cache on subsequent requests."""
+        Todo.objects.create(title="Active", resolved=False)
+        self.client.get(self.list_url)
+        
+        # Only the paginator count and the page rows run once counts are cached
+        with self.assertNumQueries(2):
+            self.client.get(self.list_url)
+
+    def test_list_view_stale_counts_do_not_hide_rows(self):
+        """Test that every todo renders even when cached counts are stale."""
+        Todo.objects.create(title="First")
+        self.client.get(self.list_url)
+        # Written behind the warm cache, so the counts are not invalidated
+        Todo.objects.create(title="Second")
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(len(response.context['todos']), 2)
+        self.assertContains(response, "First")
+        self.assertContains(response, "Second")
+
+    def test_list_view_counts_invalidated_on_create(self):
+        """Test that creating a todo refreshes the cached counts."""
+        self.client.get(self.list_url)
+        self.client.post(reverse('todos:create'), {'title': 'New Task'})
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.context['total_count'], 1)
+        self.assertEqual(response.context['active_count'], 1)
+
+    def test_list_view_counts_invalidated_on_update(self):
+        """Test that editing a todo refreshes the cached counts."""
+        todo = Todo.objects.create(title="Task")
+        self.client.get(self.list_url)
+        self.client.post(
+            reverse('todos:edit', kwargs={'pk': todo.pk}),
+            {'title': 'Task', 'resolved': True},
+        )
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.context['active_count'], 0)
+        self.assertEqual(response.context['resolved_count'], 1)
+
+    def test_list_view_counts_invalidated_on_delete(self):
+        """Test that deleting a todo refreshes the cached counts."""
+        todo = Todo.objects.create(title="Task")
+        self.client.get(self.list_url)
+        self.client.post(reverse('todos:delete', kwargs={'pk': todo.pk}))
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.context['total_count'], 0)
+
+    def test_list_view_counts_invalidated_on_toggle(self):
+        """Test that toggling a todo refreshes the cached counts."""
+        todo = Todo.objects.create(title="Task")
+        self.client.get(self.list_url)
+        self.client.post(reverse('todos:toggle', kwargs={'pk': todo.pk}))
+        
+        response = self.client.get(self.list_url)
+        
+        self.assertEqual(response.context['active_count'], 0)
+        self.assertEqual(response.context['resolved_count'], 1)
+
 
 class TodoCreateViewTests(TestCase):
     """Tests for the TodoCreateView."""
@@ -209,20 +359,20 @@ class TodoCreateViewTests(TestCase):
         response = self.client.post(self.create_url, form_data)
         
         self.assertEqual(response.status_code, 200)  # Re-renders form
-        self.assertEqual(Todo.objects.count(), 0)  # No todo created
+        self.assertFalse(Todo.objects.exists())  # No todo created
         self.assertFormError(response, 'form', 'title', 'This field is required.')
 
 
 class TodoUpdateViewTests(TestCase):
     """Tests for the TodoUpdateView."""
 
-    def setUp(self):
-        self.client = Client()
-        self.todo = Todo.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.todo = Todo.objects.create(
             title="Original Title",
             description="Original description"
         )
-        self.update_url = reverse('todos:edit', kwargs={'pk': self.todo.pk})
+        cls.update_url = reverse('todos:edit', kwargs={'pk': cls.todo.pk})
 
     def test_update_view_get(self):
         """Test that GET shows form with existing data."""
@@ -252,10 +402,10 @@ class TodoUpdateViewTests(TestCase):
 class TodoDeleteViewTests(TestCase):
     """Tests for the TodoDeleteView."""
 
-    def setUp(self):
-        self.client = Client()
-        self.todo = Todo.objects.create(title="Task to Delete")
-        self.delete_url = reverse('todos:delete', kwargs={'pk': self.todo.pk})
+    @classmethod
+    def setUpTestData(cls):
+        cls.todo = Todo.objects.create(title="Task to Delete")
+        cls.delete_url = reverse('todos:delete', kwargs={'pk': cls.todo.pk})
 
     def test_delete_view_get(self):
         """Test that GET shows confirmation page."""
@@ -271,20 +421,20 @@ class TodoDeleteViewTests(TestCase):
         response = self.client.post(self.delete_url)
         
         self.assertEqual(response.status_code, 302)  # Redirect
-        self.assertEqual(Todo.objects.count(), 0)
+        self.assertFalse(Todo.objects.exists())
 
 
 class TodoToggleViewTests(TestCase):
     """Tests for the toggle_resolved view."""
 
-    def setUp(self):
-        self.client = Client()
-        self.todo = Todo.objects.create(title="Toggle Test", resolved=False)
-        self.toggle_url = reverse('todos:toggle', kwargs={'pk': self.todo.pk})
+    @classmethod
+    def setUpTestData(cls):
+        cls.todo = Todo.objects.create(title="Toggle Test", resolved=False)
+        cls.toggle_url = reverse('todos:toggle', kwargs={'pk': cls.todo.pk})
 
     def test_toggle_resolved_to_true(self):
         """Test that toggle changes resolved from False to True."""
-        response = self.client.get(self.toggle_url)
+        response = self.client.post(self.toggle_url)
         
         self.assertEqual(response.status_code, 302)  # Redirect
         self.todo.refresh_from_db()
@@ -295,7 +445,7 @@ class TodoToggleViewTests(TestCase):
         self.todo.resolved = True
         self.todo.save()
         
-        response = self.client.get(self.toggle_url)
+        response = self.client.post(self.toggle_url)
         
         self.assertEqual(response.status_code, 302)  # Redirect
         self.todo.refresh_from_db()
@@ -304,6 +454,33 @@ class TodoToggleViewTests(TestCase):
     def test_toggle_redirects_to_next(self):
         """Test that toggle redirects to 'next' parameter if provided."""
         next_url = '/todos/?filter=active'
-        response = self.client.get(f"{self.toggle_url}?next={next_url}")
+        response = self.client.post(f"{self.toggle_url}?next={next_url}")
         
         self.assertRedirects(response, next_url)
+
+    def test_toggle_ignores_external_next(self):
+        """Test that toggle does not redirect to another host."""
+        response = self.client.post(f"{self.toggle_url}?next=https://example.com/")
+        
+        self.assertRedirects(response, reverse('todos:list'))
+
+    def test_toggle_rejects_get(self):
+        """Test that toggle only accepts POST requests."""
+        response = self.client.get(self.toggle_url)
+        
+        self.assertEqual(response.status_code, 405)
+        self.todo.refresh_from_db()
+        self.assertFalse(self.todo.resolved)
+
+    def test_toggle_missing_todo_returns_404(self):
+        """Test that toggling a nonexistent todo returns 404."""
+        missing_url = reverse('todos:toggle', kwargs={'pk': self.todo.pk + 1})
+        
+        response = self.client.post(missing_url)
+        
+        self.assertEqual(response.status_code, 404)
+
+    def test_toggle_single_query(self):
+        """Test that toggle flips the flag with a single UPDATE."""
+        with self.assertNumQueries(1):
+            self.client.post(self.toggle_url)
@@ -1,62 +1,161 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from datetime import date
+from functools import lru_cache
+from django.shortcuts import render, redirect
+from django.core.cache import cache
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
-from django.urls import reverse_lazy
-from django.http import HttpResponseRedirect
+from django.urls import reverse, reverse_lazy
+from django.db.models import BooleanField, Case, Count, F, Q, Value, When
+from django.http import Http404
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
 from .models import Todo
 from .forms import TodoForm
 
+COUNTS_CACHE_KEY = 'todos:counts'
+COUNTS_CACHE_TIMEOUT = 30
+
+# Conditions for the ?filter= tabs; anything else shows all todos
+_FILTER_Q = {
+    'active': Q(resolved=False),
+    'resolved': Q(resolved=True),
+}
+
+
+def _get_counts():
+    """Return active/resolved todo counts, cached for a short time.
+
+    The counts are best-effort: with the default per-process cache, writes
+    made by other workers, the shell or migrations only show up once the
+    entry expires. Use them for display only, never to pick which rows render.
+
+    Kept as a standalone aggregate rather than window annotations on the
+    list query: the list is filtered and paginated, and the paginator
+    needs the count before the page is fetched.
+    """
+    return cache.get_or_set(
+        COUNTS_CACHE_KEY,
+        lambda: Todo.objects.aggregate(
+            active=Count('pk', filter=Q(resolved=False)),
+            resolved=Count('pk', filter=Q(resolved=True)),
+        ),
+        COUNTS_CACHE_TIMEOUT,
+    )
+
+
+@lru_cache(maxsize=None)
+def _list_url():
+    """Resolve the list URL once per process."""
+    return reverse('todos:list')
+
+
+def _invalidate_counts():
+    """Drop the cached counts after a todo is created, changed or deleted."""
+    cache.delete(COUNTS_CACHE_KEY)
+
+
+class InvalidateCountsMixin:
+    """Invalidate the cached counts once the form has been processed."""
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        _invalidate_counts()
+        return response
+
 
 class TodoListView(ListView):
     model = Todo
     template_name = 'todos/todo_list.html'
     context_object_name = 'todos'
+    paginate_by = 50
+    # Columns rendered by the list template; timestamps are only used for ordering
+    list_fields = ('id', 'title', 'description', 'due_date', 'resolved')
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        filter_type = self.request.GET.get('filter', 'all')
-        
-        if filter_type == 'active':
-            queryset = queryset.filter(resolved=False)
-        elif filter_type == 'resolved':
-            queryset = queryset.filter(resolved=True)
+        filter_type = self.request.GET.get('filter')
+        q = _FILTER_Q.get(filter_type)
+        self.filter_type = filter_type if q is not None else 'all'
+        if q is not None:
+            queryset = queryset.filter(q)
         
-        return queryset
+        # Let the database flag due dates instead of filtering per row in the template
+        today = date.today()
+        return queryset.only(*self.list_fields).annotate(
+            is_overdue=Case(
+                When(due_date__lt=today, resolved=False, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            is_today=Case(
+                When(due_date=today, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        # Fall back to the nearest valid page instead of a 404, e.g. after
+        # completing the only todo on the last page of a filtered tab
+        paginator = self.get_paginator(
+            queryset,
+            page_size,
+            orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        page_number = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg)
+        page = paginator.get_page(page_number)
+        return (paginator, page, page.object_list, page.has_other_pages())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['filter'] = self.request.GET.get('filter', 'all')
-        context['total_count'] = Todo.objects.count()
-        context['active_count'] = Todo.objects.filter(resolved=False).count()
-        context['resolved_count'] = Todo.objects.filter(resolved=True).count()
+        context['filter'] = self.filter_type
+        counts = _get_counts()
+        # resolved is non-nullable, so every todo lands in exactly one bucket
+        context['total_count'] = counts['active'] + counts['resolved']
+        context['active_count'] = counts['active']
+        context['resolved_count'] = counts['resolved']
         return context
 
 
-class TodoCreateView(CreateView):
+class TodoCreateView(InvalidateCountsMixin, CreateView):
     model = Todo
     form_class = TodoForm
     template_name = 'todos/todo_form.html'
     success_url = reverse_lazy('todos:list')
 
 
-class TodoUpdateView(UpdateView):
+class TodoUpdateView(InvalidateCountsMixin, UpdateView):
     model = Todo
     form_class = TodoForm
     template_name = 'todos/todo_form.html'
     success_url = reverse_lazy('todos:list')
 
 
-class TodoDeleteView(DeleteView):
+class TodoDeleteView(InvalidateCountsMixin, DeleteView):
     model = Todo
     template_name = 'todos/todo_confirm_delete.html'
     success_url = reverse_lazy('todos:list')
 
 
+@require_POST
 def toggle_resolved(request, pk):
     """Toggle the resolved status of a todo."""
-    todo = get_object_or_404(Todo, pk=pk)
-    todo.resolved = not todo.resolved
-    todo.save()
+    # Flip the flag in a single UPDATE; queryset updates skip auto_now
+    updated = Todo.objects.filter(pk=pk).update(
+        resolved=~F('resolved'),
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        raise Http404('No Todo matches the given query.')
+    _invalidate_counts()
     
     # Redirect back to the referring page or the list
-    next_url = request.GET.get('next', reverse_lazy('todos:list'))
-    return HttpResponseRedirect(next_url)
+    next_url = request.GET.get('next')
+    if next_url and url_has_allowed_host_and_scheme(
+        next_url,
+        allowed_hosts={request.get_host()},
+        require_https=request.is_secure(),
+    ):
+        return redirect(next_url)
+    return redirect(_list_url())